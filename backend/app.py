@@ -4,25 +4,443 @@ Provides endpoints for SQL formatting, validation, and minification.
 """
 
 from flask import Flask, request, jsonify, send_from_directory
-from flask_cors import CORS
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
+from flask_cors import CORS, cross_origin
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import partial
+from importlib import metadata
+import hashlib
+import orjson
 import os
 import sys
+import threading
+import time
 
 # Add the backend directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from formatter import SQLFormatter
+from config import SQLFormatterConfig, get_config
+
+API_VERSION = '1.0.0'
+_FORMATTER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'formatter.py')
+
+
+def _load_formatter_class():
+    """
+    Pick the SQLFormatter implementation.
+    
+    The Cython build (see formatter_fast.pyx) is only used when
+    SQL_FORMATTER_CYTHON=1 and it was compiled after the last change to
+    formatter.py; a stale build would otherwise shadow the source silently.
+    """
+    if os.environ.get('SQL_FORMATTER_CYTHON') == '1':
+        try:
+            import formatter_fast
+        except ImportError:
+            print("SQL_FORMATTER_CYTHON=1 but formatter_fast is not built; using formatter.py",
+                  file=sys.stderr)
+        else:
+            if os.path.getmtime(formatter_fast.__file__) >= os.path.getmtime(_FORMATTER_SOURCE):
+                return formatter_fast.SQLFormatter
+            print("formatter_fast is older than formatter.py; rebuild it. Using formatter.py",
+                  file=sys.stderr)
+    from formatter import SQLFormatter
+    return SQLFormatter
+
+
+SQLFormatter = _load_formatter_class()
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster encode/decode."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            mimetype='application/json'
+        )
+
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend-backend communication
+app.json = OrjsonProvider(app)
 
 # Initialize SQL formatter
 sql_formatter = SQLFormatter()
 
-# Configuration
-app.config['DEBUG'] = True
-app.config['JSON_SORT_KEYS'] = False
+# Warm up: the first calls pay for sqlparse's lazy regex compilation and
+# keyword table setup, so do them at import (once, before gunicorn forks
+# under --preload) rather than on the first user request
+sql_formatter.format_sql("SELECT 1", {})
+sql_formatter.validate_sql("SELECT 1")
+sql_formatter.minify_sql("SELECT 1")
+# A statement over formatter._NUMBA_MIN_LENGTH characters, so the optional
+# numba balance scanner is JIT-compiled here rather than in every worker
+sql_formatter.validate_sql("SELECT 1;\n" * 512)
+# Drop the warm-up entries so /api/cache/stats starts from zero; sqlparse's
+# imports and compiled regexes stay warm
+sql_formatter.clear_caches()
+
+# Immutable data derived once at import instead of per request
+_SQL_KEYWORDS_HEAD = sql_formatter.get_sql_keywords()[:50]  # First 50 keywords for reference
+_DEFAULT_OPTIONS = dict(sql_formatter.default_options)
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend')
+_CSS_DIR = os.path.join(_FRONTEND_DIR, 'css')
+_JS_DIR = os.path.join(_FRONTEND_DIR, 'js')
+
+# Browser cache lifetime for CSS/JS assets (seconds)
+STATIC_MAX_AGE = 3600
+
+# Named presets resolved once into merged options and canonical cache keys
+_PRESET_OPTIONS = {
+    name: {**sql_formatter.default_options, **opts}
+    for name, opts in SQLFormatterConfig.FORMATTING_PRESETS.items()
+}
+_PRESET_KEYS = {
+    name: sql_formatter.options_key(opts)
+    for name, opts in _PRESET_OPTIONS.items()
+}
+
+# Bounded pool that runs all formatter work, so each call can be abandoned
+# after VALIDATION_TIMEOUT and concurrency can't grow with request threads
+FORMATTER_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+_formatter_pool = ThreadPoolExecutor(
+    max_workers=FORMATTER_WORKERS,
+    thread_name_prefix='fmt'
+)
+
+# Batch formatting: items per request, and how many of one request's items
+# may be queued on the pool at once, so a single batch can't take every worker
+MAX_BATCH_ITEMS = 256
+BATCH_MAX_IN_FLIGHT = max(1, FORMATTER_WORKERS // 2)
+
+# Single-flight map: (sql, options key) -> Future for format calls in progress
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _resolve_options(options, preset=None):
+    """
+    Apply an optional named preset and return ``(options, opts_key)``.
+    
+    A bare preset maps straight to its precomputed cache key, skipping the
+    per-request merge; explicit options are layered on top of the preset.
+    """
+    if preset is not None:
+        if not options:
+            return _PRESET_OPTIONS[preset], _PRESET_KEYS[preset]
+        options = {**_PRESET_OPTIONS[preset], **options}
+    return options, sql_formatter.options_key(options)
+
+
+def _submit_format(sql_text, options, opts_key):
+    """
+    Start a format call on the shared pool, collapsing concurrent duplicates.
+    
+    The first request for a given (sql, options) key submits the formatter;
+    identical requests arriving while it is in flight get the same Future
+    instead of repeating the work. Uncacheable options always submit.
+    """
+    if opts_key is None:
+        return _formatter_pool.submit(sql_formatter.format_sql, sql_text, options)
+    
+    key = (sql_text, opts_key)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future
+        future = _formatter_pool.submit(sql_formatter.format_sql, sql_text, options)
+        _inflight[key] = future
+    
+    # Outside the lock: the callback runs right away if the call already finished
+    future.add_done_callback(partial(_forget_inflight, key))
+    return future
+
+
+def _forget_inflight(key, future):
+    """Drop a finished call from the single-flight map."""
+    with _inflight_lock:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+
+def _format_single_flight(sql_text, options, opts_key):
+    """Format SQL through _submit_format(), waiting at most VALIDATION_TIMEOUT."""
+    return _submit_format(sql_text, options, opts_key).result(
+        timeout=SQLFormatterConfig.VALIDATION_TIMEOUT
+    )
+
+
+def _run_with_timeout(fn, *args):
+    """
+    Run a formatter call on the shared pool and wait at most
+    SQLFormatterConfig.VALIDATION_TIMEOUT seconds for it.
+    
+    Raises:
+        TimeoutError: if the call doesn't finish in time
+    """
+    future = _formatter_pool.submit(fn, *args)
+    return future.result(timeout=SQLFormatterConfig.VALIDATION_TIMEOUT)
+
+
+def _prepare_batch_item(item):
+    """
+    Check a single ``{"sql": ..., "options": ..., "preset": ...}`` batch entry.
+    
+    Returns:
+        tuple: ((sql_text, options, opts_key), None) for a valid entry, or
+        (None, error result) for an invalid one
+    """
+    if not isinstance(item, dict):
+        return None, {
+            'success': False,
+            'error': _ERR_NO_SQL
+        }
+    
+    sql_text = item.get('sql', '')
+    options = item.get('options') or {}
+    preset = item.get('preset')
+    problem = _check_sql_fields(sql_text, options, preset)
+    if problem:
+        return None, {
+            'success': False,
+            'error': problem[0]
+        }
+    
+    options, opts_key = _resolve_options(options, preset)
+    return (sql_text, options, opts_key), None
+
+
+def _format_batch(items):
+    """
+    Format batch entries through single-flight, in order.
+    
+    At most BATCH_MAX_IN_FLIGHT items are on the pool at a time, and the
+    whole batch shares one VALIDATION_TIMEOUT deadline.
+    
+    Raises:
+        TimeoutError: if the batch doesn't finish in time
+    """
+    deadline = time.monotonic() + SQLFormatterConfig.VALIDATION_TIMEOUT
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        call, error = _prepare_batch_item(item)
+        if call is None:
+            results[index] = error
+        else:
+            pending.append((index, call))
+    
+    for start in range(0, len(pending), BATCH_MAX_IN_FLIGHT):
+        chunk = pending[start:start + BATCH_MAX_IN_FLIGHT]
+        futures = [_submit_format(*call) for _, call in chunk]
+        for (index, _), future in zip(chunk, futures):
+            results[index] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+    return results
+
+
+def _load_request_data():
+    """
+    Read the request body once and decode it.
+    
+    JSON bodies are parsed straight from the raw bytes; ``application/sql``
+    bodies are taken verbatim as the SQL text. Returns None for an empty,
+    malformed or non-JSON body rather than raising.
+    """
+    if request.content_length == 0:
+        return None
+    
+    if request.mimetype == 'application/sql':
+        sql_text = request.stream.read().decode('utf-8', 'replace')
+        return {'sql': sql_text} if sql_text else None
+    
+    return request.get_json(silent=True, cache=False)
+
+
+def _check_sql_fields(sql_text, options, preset=None):
+    """Return an ``(error message, status)`` pair for bad sql/options/preset, or None."""
+    if not isinstance(sql_text, str) or not sql_text:
+        return _ERR_NO_SQL, 400
+    
+    if len(sql_text) > SQLFormatterConfig.MAX_SQL_LENGTH:
+        return f'SQL exceeds maximum length of {SQLFormatterConfig.MAX_SQL_LENGTH} characters', 413
+    
+    if not isinstance(options, dict):
+        return 'Options must be a JSON object', 400
+    
+    if preset is not None and (not isinstance(preset, str) or preset not in _PRESET_KEYS):
+        return f'Unknown preset: {preset}', 400
+    
+    return None
+
+
+def _read_sql_payload():
+    """
+    Read and check the ``{"sql": ..., "options": ..., "preset": ...}`` payload.
+    
+    Malformed input is detected with plain conditionals instead of parser
+    exceptions, so the error path stays cheap. A ``preset`` names one of
+    SQLFormatterConfig.FORMATTING_PRESETS; any ``options`` override it.
+    
+    Returns:
+        tuple: (sql_text, options, opts_key, error) where opts_key is the
+        canonical cache key (None if uncacheable) and error is a
+        ready-to-return ``(response, status)`` pair, or None when the
+        payload is usable
+    """
+    if not request.is_json and request.mimetype != 'application/sql':
+        return None, None, None, _error_response(_ERR_UNSUPPORTED_TYPE, 415)
+    
+    data = _load_request_data()
+    if not isinstance(data, dict) or not data:
+        return None, None, None, _error_response(_ERR_NO_JSON, 400)
+    
+    sql_text = data.get('sql', '')
+    options = data.get('options') or {}
+    preset = data.get('preset')
+    problem = _check_sql_fields(sql_text, options, preset)
+    if problem:
+        return None, None, None, _error_response(*problem)
+    
+    options, opts_key = _resolve_options(options, preset)
+    return sql_text, options, opts_key, None
+
+
+def _error_response(message, status):
+    """Build the standard ``{"success": false, "error": ...}`` response."""
+    payload = _ERROR_PAYLOADS.get(message)
+    if payload is None:
+        payload = orjson.dumps({'success': False, 'error': message})
+    return _json_response(payload, status)
+
+
+def _cache_stats(info):
+    """Summarize an lru_cache's CacheInfo counters for the stats endpoint."""
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0,
+        'maxsize': info.maxsize,
+        'currsize': info.currsize
+    }
+
+
+# Configuration: DEBUG/TESTING come from the environment-specific Config
+cfg = get_config()
+app.config.from_object(cfg)
+
+# MAX_SQL_LENGTH counts characters of SQL, while the body limit counts bytes
+# of the whole request: leave room for UTF-8 (up to 4 bytes a character) and
+# the JSON envelope, so the per-field length check is the one that answers
+MAX_REQUEST_BYTES = 4 * SQLFormatterConfig.MAX_SQL_LENGTH + 64 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
+
+# CORS for the API only, restricted to the configured origins; browsers may
+# cache preflight results for a day. Static assets are served same-origin,
+# and the read-only options/health endpoints opt into a public wildcard.
+CORS_MAX_AGE = 86400
+CORS(
+    app,
+    resources={r'/api/*': {'origins': list(cfg.CORS_ORIGINS)}},
+    max_age=CORS_MAX_AGE,
+    send_wildcard=False
+)
+
+# Response compression: brotli preferred, gzip fallback; skip tiny bodies
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+Compress(app)
+
+# Responses that never depend on request state are serialized once at import.
+# Handlers wrap the shared bytes in a fresh Response each time, since
+# after_request hooks (e.g. CORS) mutate response headers.
+_OPTIONS_PAYLOAD = orjson.dumps({
+    'success': True,
+    'options': _DEFAULT_OPTIONS,
+    'keyword_cases': ['upper', 'lower', 'capitalize'],
+    'identifier_cases': [None, 'upper', 'lower', 'capitalize'],
+    'indent_widths': [2, 4, 8],
+    'presets': SQLFormatterConfig.FORMATTING_PRESETS,
+    'sql_keywords': _SQL_KEYWORDS_HEAD
+})
+
+_HEALTH_PAYLOAD = orjson.dumps({
+    'status': 'healthy',
+    'service': 'SQL Formatter API',
+    'version': API_VERSION
+})
+
+# Error messages hit by malformed or unknown requests; their bodies are
+# encoded once and reused by _error_response()
+_ERR_UNSUPPORTED_TYPE = 'Content-Type must be application/json'
+_ERR_NO_JSON = 'No JSON data provided'
+_ERR_NO_SQL = 'No SQL text provided'
+_ERR_NOT_FOUND = 'Endpoint not found'
+_ERR_TOO_LARGE = 'SQL payload too large'
+_ERR_TIMEOUT = 'SQL processing timed out'
+_ERR_INTERNAL = 'Internal server error'
+
+_ERROR_PAYLOADS = {
+    message: orjson.dumps({'success': False, 'error': message})
+    for message in (_ERR_UNSUPPORTED_TYPE, _ERR_NO_JSON, _ERR_NO_SQL,
+                    _ERR_NOT_FOUND, _ERR_TOO_LARGE, _ERR_TIMEOUT, _ERR_INTERNAL)
+}
+
+
+def _send_static(directory, filename):
+    """
+    Send a CSS/JS asset that browsers may reuse for STATIC_MAX_AGE seconds.
+    
+    The asset URLs aren't versioned, so responses aren't marked immutable:
+    a reload still revalidates through the ETag/Last-Modified validators
+    and picks up a deploy.
+    """
+    response = send_from_directory(directory, filename, max_age=STATIC_MAX_AGE)
+    response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
+    return response
+
+
+def _formatter_version():
+    """Identify the code that produces formatted output: app, sqlparse and formatter.py."""
+    with open(_FORMATTER_SOURCE, 'rb') as source:
+        source_digest = hashlib.blake2b(source.read(), digest_size=8).hexdigest()
+    return f'{API_VERSION}:{metadata.version("sqlparse")}:{source_digest}'
+
+
+# Hashed into every format ETag, so validators issued before a deploy that
+# changes the formatter's output stop matching
+_FORMATTER_VERSION = _formatter_version()
+
+
+def _format_etag(sql_text, opts_key):
+    """Strong validator for a format request; None when options aren't canonical."""
+    if opts_key is None:
+        return None
+    return hashlib.blake2b(repr((_FORMATTER_VERSION, sql_text, opts_key)).encode('utf-8'),
+                           digest_size=16).hexdigest()
+
+
+def _etag_matches(etag):
+    """Check If-None-Match, ignoring the ':br'/':gzip' suffix Flask-Compress appends."""
+    return any(tag.split(':', 1)[0] == etag
+               for tag in request.if_none_match.as_set())
+
+
+def _json_response(payload, status=200):
+    """Wrap pre-serialized JSON bytes in a new Response."""
+    return app.response_class(payload, status=status, mimetype='application/json')
 
 
 @app.route('/')
@@ -30,8 +448,7 @@ def index():
     """Serve the main application page."""
     try:
         # Serve the frontend index.html file
-        frontend_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend')
-        return send_from_directory(frontend_dir, 'index.html')
+        return send_from_directory(_FRONTEND_DIR, 'index.html')
     except Exception as e:
         return jsonify({'error': 'Frontend not found', 'details': str(e)}), 404
 
@@ -40,9 +457,7 @@ def index():
 def serve_css(filename):
     """Serve CSS files."""
     try:
-        frontend_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend')
-        css_dir = os.path.join(frontend_dir, 'css')
-        return send_from_directory(css_dir, filename)
+        return _send_static(_CSS_DIR, filename)
     except Exception as e:
         return jsonify({'error': 'CSS file not found', 'details': str(e)}), 404
 
@@ -50,9 +465,7 @@ def serve_css(filename):
 def serve_js(filename):
     """Serve JavaScript files."""
     try:
-        frontend_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend')
-        js_dir = os.path.join(frontend_dir, 'js')
-        return send_from_directory(js_dir, filename)
+        return _send_static(_JS_DIR, filename)
     except Exception as e:
         return jsonify({'error': 'JS file not found', 'details': str(e)}), 404
 
@@ -65,6 +478,7 @@ def format_sql():
     Expected JSON payload:
     {
         "sql": "SELECT * FROM users WHERE id=1",
+        "preset": "compact",          (optional)
         "options": {
             "keyword_case": "upper",
             "indent_width": 4,
@@ -73,35 +487,78 @@ def format_sql():
         }
     }
     """
+    sql_text, options, opts_key, error = _read_sql_payload()
+    if error:
+        return error
+    
+    # Re-posts of the same SQL and options get an empty 304 instead of the body
+    etag = _format_etag(sql_text, opts_key)
+    if etag is not None and _etag_matches(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No JSON data provided'
-            }), 400
-        
-        sql_text = data.get('sql', '')
-        options = data.get('options', {})
-        
-        if not sql_text:
-            return jsonify({
-                'success': False,
-                'error': 'No SQL text provided'
-            }), 400
-        
         # Format the SQL
-        result = sql_formatter.format_sql(sql_text, options)
-        
-        return jsonify(result)
-        
+        result = _format_single_flight(sql_text, options, opts_key)
+    except TimeoutError:
+        return _error_response(_ERR_TIMEOUT, 504)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Server error: {str(e)}',
-            'formatted_sql': data.get('sql', '') if 'data' in locals() else ''
+            'formatted_sql': sql_text
         }), 500
+    
+    response = jsonify(result)
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    return response
+
+
+@app.route('/api/format/batch', methods=['POST'])
+def format_sql_batch():
+    """
+    Format several SQL snippets in one request.
+    
+    Expected JSON payload:
+    {
+        "items": [
+            {"sql": "SELECT * FROM users", "options": {"keyword_case": "lower"}},
+            {"sql": "SELECT id FROM orders"},
+            ...
+        ]
+    }
+    
+    Results are returned in the same order as the items.
+    """
+    if not request.is_json:
+        return _error_response(_ERR_UNSUPPORTED_TYPE, 415)
+    
+    data = _load_request_data()
+    if not isinstance(data, dict) or not data:
+        return _error_response(_ERR_NO_JSON, 400)
+    
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return _error_response('No items provided', 400)
+    
+    if len(items) > MAX_BATCH_ITEMS:
+        return _error_response(f'Too many items (maximum {MAX_BATCH_ITEMS})', 400)
+    
+    try:
+        # Items share the single-request result cache and in-flight calls
+        results = _format_batch(items)
+    except TimeoutError:
+        return _error_response(_ERR_TIMEOUT, 504)
+    except Exception as e:
+        return _error_response(f'Batch format error: {str(e)}', 500)
+    
+    return jsonify({
+        'success': True,
+        'results': results
+    })
 
 
 @app.route('/api/validate', methods=['POST'])
@@ -114,36 +571,22 @@ def validate_sql():
         "sql": "SELECT * FROM users"
     }
     """
+    sql_text, _, _, error = _read_sql_payload()
+    if error:
+        return error
+    
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No JSON data provided'
-            }), 400
-        
-        sql_text = data.get('sql', '')
-        
-        if not sql_text:
-            return jsonify({
-                'success': False,
-                'error': 'No SQL text provided'
-            }), 400
-        
         # Validate the SQL
-        validation_result = sql_formatter.validate_sql(sql_text)
-        
-        return jsonify({
-            'success': True,
-            'validation': validation_result
-        })
-        
+        validation_result = _run_with_timeout(sql_formatter.validate_sql, sql_text)
+    except TimeoutError:
+        return _error_response(_ERR_TIMEOUT, 504)
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'Validation error: {str(e)}'
-        }), 500
+        return _error_response(f'Validation error: {str(e)}', 500)
+    
+    return jsonify({
+        'success': True,
+        'validation': validation_result
+    })
 
 
 @app.route('/api/minify', methods=['POST'])
@@ -156,106 +599,103 @@ def minify_sql():
         "sql": "SELECT * FROM users WHERE id = 1"
     }
     """
+    sql_text, _, _, error = _read_sql_payload()
+    if error:
+        return error
+    
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No JSON data provided'
-            }), 400
-        
-        sql_text = data.get('sql', '')
-        
-        if not sql_text:
-            return jsonify({
-                'success': False,
-                'error': 'No SQL text provided'
-            }), 400
-        
         # Minify the SQL
-        minified = sql_formatter.minify_sql(sql_text)
-        
-        return jsonify({
-            'success': True,
-            'minified_sql': minified,
-            'original_length': len(sql_text),
-            'minified_length': len(minified),
-            'compression_ratio': round((1 - len(minified) / len(sql_text)) * 100, 1) if len(sql_text) > 0 else 0
-        })
-        
+        minified = _run_with_timeout(sql_formatter.minify_sql, sql_text)
+    except TimeoutError:
+        return _error_response(_ERR_TIMEOUT, 504)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': f'Minification error: {str(e)}',
             'minified_sql': sql_text
         }), 500
+    
+    return jsonify({
+        'success': True,
+        'minified_sql': minified,
+        'original_length': len(sql_text),
+        'minified_length': len(minified),
+        'compression_ratio': round((1 - len(minified) / len(sql_text)) * 100, 1)
+    })
 
 
 @app.route('/api/options', methods=['GET'])
+@cross_origin(origins='*', send_wildcard=True, max_age=CORS_MAX_AGE)
 def get_format_options():
     """Get available formatting options and their default values."""
-    try:
-        return jsonify({
-            'success': True,
-            'options': sql_formatter.default_options,
-            'keyword_cases': ['upper', 'lower', 'capitalize'],
-            'identifier_cases': [None, 'upper', 'lower', 'capitalize'],
-            'indent_widths': [2, 4, 8],
-            'sql_keywords': sql_formatter.get_sql_keywords()[:50]  # First 50 keywords for reference
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': f'Error getting options: {str(e)}'
-        }), 500
+    return _json_response(_OPTIONS_PAYLOAD)
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Report hit/miss counters for the formatter result caches."""
+    formatter_caches = sql_formatter.cache_info()
+    return jsonify({
+        'success': True,
+        'caches': {
+            'format': _cache_stats(formatter_caches['format']),
+            'validate': _cache_stats(formatter_caches['validate']),
+            'minify': _cache_stats(formatter_caches['minify']),
+            'tokens': _cache_stats(formatter_caches['tokens'])
+        }
+    })
 
 
 @app.route('/api/health', methods=['GET'])
+@cross_origin(origins='*', send_wildcard=True, max_age=CORS_MAX_AGE)
 def health_check():
     """Health check endpoint."""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'SQL Formatter API',
-        'version': '1.0.0'
-    })
+    return _json_response(_HEALTH_PAYLOAD)
 
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors."""
-    return jsonify({
-        'success': False,
-        'error': 'Endpoint not found'
-    }), 404
+    return _error_response(_ERR_NOT_FOUND, 404)
+
+
+@app.errorhandler(413)
+def payload_too_large(error):
+    """Handle request bodies over MAX_CONTENT_LENGTH."""
+    return _error_response(_ERR_TOO_LARGE, 413)
 
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors."""
-    return jsonify({
-        'success': False,
-        'error': 'Internal server error'
-    }), 500
+    return _error_response(_ERR_INTERNAL, 500)
 
 
 if __name__ == '__main__':
+    # The Werkzeug server is for development only; production runs under
+    # gunicorn (see Procfile), which forks workers after this module loads.
+    if os.environ.get('FLASK_ENV', 'development') != 'development':
+        print("Refusing to start the development server outside development.")
+        print("Run under a WSGI server instead, e.g.:")
+        print("  gunicorn -w $(nproc) -k sync -b 127.0.0.1:$PORT --keep-alive 30 --preload backend.app:app")
+        print("  waitress-serve --listen=127.0.0.1:$PORT backend.app:app  (Windows)")
+        sys.exit(1)
+    
     # Development server
     print("Starting SQL Formatter API...")
     print("Available endpoints:")
     print("  POST /api/format   - Format SQL")
+    print("  POST /api/format/batch - Format multiple SQL snippets")
     print("  POST /api/validate - Validate SQL")
     print("  POST /api/minify   - Minify SQL")
     print("  GET  /api/options  - Get formatting options")
+    print("  GET  /api/cache/stats - Result cache statistics")
     print("  GET  /api/health   - Health check")
     print("  GET  /            - Frontend application")
     
-    # Get port from environment or use default
-    port = int(os.environ.get('PORT', 5000))
-    
     app.run(
-        host='127.0.0.1',
-        port=port,
-        debug=True,
+        host=cfg.HOST,
+        port=cfg.PORT,
+        debug=cfg.DEBUG,
         threaded=True
     )
\ No newline at end of file
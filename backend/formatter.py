@@ -3,13 +3,381 @@ Core SQL formatting functionality using sqlparse library.
 Handles various formatting options and SQL dialect support.
 """
 
-import sqlparse
-from sqlparse import sql, tokens as T, keywords as K
+import re as stdlib_re
+import sys
 
+try:
+    # RE2 is a linear-time DFA engine; its API mirrors the stdlib module
+    import re2 as re
+    _RE_FLAGS = 0  # RE2's \b and \d are ASCII-only, and it has no flag constants
+except ImportError:
+    import re
+    _RE_FLAGS = re.ASCII  # so the validator gives the same results as under RE2
 
-class SQLFormatter:
+from collections import namedtuple
+from functools import lru_cache, partial
+from itertools import islice
+from threading import Lock
+from types import FunctionType, MappingProxyType
+
+
+# sqlparse is imported on first use; validate_sql() is plain string work, so a
+# process that only validates never loads sqlparse or its keyword tables
+_sqlparse = None
+
+
+def _load_sqlparse():
+    """Import sqlparse and bind the submodules this module uses, once."""
+    global _sqlparse, K, lexer, filters, sqlparse_formatter, grouping, StatementSplitter
+    if _sqlparse is None:
+        import sqlparse
+        from sqlparse import keywords as K
+        from sqlparse import filters, lexer
+        from sqlparse import formatter as sqlparse_formatter
+        from sqlparse.engine import grouping
+        from sqlparse.engine.statement_splitter import StatementSplitter
+        _sqlparse = sqlparse
+    return _sqlparse
+
+
+# Validator patterns, compiled once at import
+_IDENT_RE = re.compile(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', _RE_FLAGS)
+_EXPR_RE = re.compile(r'\d+\s*[\+\-\*\/]|\(\)', _RE_FLAGS)
+
+# Closed string literals, quoted identifiers and comments, whose contents don't
+# count towards paren/quote balance. An unterminated ', " or /* doesn't match,
+# so its opener is left behind for _scan_balance() to see. These use the stdlib
+# engine: RE2's wrapper pays a large per-match cost in finditer()/sub(), and
+# every alternative here starts with a distinct character, so backtracking
+# stays linear.
+_LITERAL_SPAN_RE = stdlib_re.compile(
+    r"'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/", stdlib_re.S
+)
+_LITERAL_START_RE = stdlib_re.compile(r"['\"]|--|/\*")
+
+
+# The lexed tuples take about 50 bytes per input character (0.4 MB at 8K), so
+# the token cache gets its own, much lower length cap than the result caches:
+# at most _LEX_CACHE_SIZE * 0.4 MB per process
+_LEX_CACHE_MAX_LENGTH = 8192
+_LEX_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=_LEX_CACHE_SIZE)
+def _lex_cached(sql_text):
+    """Tokenize SQL once; the (ttype, value) pairs are immutable and shareable."""
+    return tuple(lexer.tokenize(sql_text))
+
+
+def _lex(sql_text):
+    """Return the token stream for sql_text, cached for inputs of bounded size."""
+    _load_sqlparse()
+    if len(sql_text) <= _LEX_CACHE_MAX_LENGTH:
+        return _lex_cached(sql_text)
+    return lexer.tokenize(sql_text)
+
+
+class _TokenStreamStack:
+    """
+    Stand-in for sqlparse's FilterStack that starts from an already lexed stream.
+    
+    Mirrors FilterStack (duck-typed, so defining it doesn't import sqlparse)
+    minus the lexing step in run(). Statements are still built fresh per run,
+    since statement filters mutate the parse tree. Tied to the sqlparse version
+    pinned in requirements.txt; re-check it against FilterStack on upgrade.
+    """
+    
     def __init__(self):
-        self.default_options = {
+        self.preprocess = []
+        self.stmtprocess = []
+        self.postprocess = []
+        self._grouping = False
+    
+    def enable_grouping(self):
+        self._grouping = True
+    
+    def run(self, stream):
+        for filter_ in self.preprocess:
+            stream = filter_.process(stream)
+        
+        for stmt in StatementSplitter().process(stream):
+            if self._grouping:
+                stmt = grouping.group(stmt)
+            
+            for filter_ in self.stmtprocess:
+                filter_.process(stmt)
+            
+            for filter_ in self.postprocess:
+                stmt = filter_.process(stmt)
+            
+            yield stmt
+
+
+def _render(sql_text, **options):
+    """Equivalent of sqlparse.format() that reuses the cached token stream."""
+    _load_sqlparse()
+    return _render_validated(sql_text, sqlparse_formatter.validate_options(options))
+
+
+def _render_validated(sql_text, options):
+    """Render with options already passed through validate_options()."""
+    _load_sqlparse()
+    # Filters carry per-run state, so the stack itself is built fresh each time
+    stack = sqlparse_formatter.build_filter_stack(_TokenStreamStack(), options)
+    stack.postprocess.append(filters.SerializerUnicode())
+    return ''.join(stack.run(_lex(sql_text)))
+
+
+# SQLFormatter options that are handed to sqlparse
+_SQLPARSE_OPTION_NAMES = (
+    'keyword_case', 'identifier_case', 'strip_comments', 'indent_tabs',
+    'indent_width', 'wrap_after', 'comma_first', 'reindent', 'strip_whitespace'
+)
+
+
+@lru_cache(maxsize=64)
+def _get_format_fn(options_key):
+    """Renderer for a sorted options tuple, with its sqlparse options validated once."""
+    _load_sqlparse()
+    format_options = dict(options_key)
+    validated = sqlparse_formatter.validate_options(
+        {name: format_options[name] for name in _SQLPARSE_OPTION_NAMES}
+    )
+    return partial(_render_validated, options=validated)
+
+
+@lru_cache(maxsize=None)
+def _sql_keywords():
+    """sqlparse's keyword names, read once on first use."""
+    _load_sqlparse()
+    return tuple(K.KEYWORDS)
+
+
+# One validate_sql() finding; turned into a dict when results leave SQLFormatter
+ErrorDetail = namedtuple('ErrorDetail', 'type message position token')
+
+# Functions and literals that don't imply a column reference in a bare SELECT
+_SQL_FUNCTIONS = frozenset({
+    'NOW', 'COUNT', 'SUM', 'AVG', 'MAX', 'MIN', 'CURRENT_DATE',
+    'CURRENT_TIME', 'CURRENT_TIMESTAMP', 'NULL', 'TRUE', 'FALSE',
+    'CONCAT', 'LENGTH', 'UPPER', 'LOWER', 'TRIM', 'SUBSTRING'
+})
+
+# Every byte except parentheses, for bytes.translate(None, ...)
+_NON_PAREN_BYTES = bytes(b for b in range(256) if b not in b"()")
+
+# Below this length str.count beats encode + translate
+_TRANSLATE_MIN_LENGTH = 1024
+
+# Above this length the numba scanner, when installed, replaces the regex pass
+_NUMBA_MIN_LENGTH = 4096
+
+# Rule 6 findings for a span left open, keyed by its opening character
+_UNTERMINATED_SPANS = {
+    "'": ('unmatched_quote', 'Unmatched single quote', "'"),
+    '"': ('unmatched_quote', 'Unmatched double quote', '"'),
+    '/': ('unterminated_comment', 'Unterminated block comment', '/*')
+}
+
+# Case option values arrive as fresh strings in every request body; mapping
+# them to one interned copy lets cache-key comparisons short-circuit on identity
+_INTERNED_VALUES = {
+    value: sys.intern(value) for value in ('upper', 'lower', 'capitalize')
+}
+
+# Misspelled leading commands recognized by validate_sql
+_COMMAND_TYPOS = {
+    'SELCT': 'SELECT', 'SLEECT': 'SELECT', 'SLECT': 'SELECT',
+    'INSERTT': 'INSERT', 'INSRT': 'INSERT',
+    'UPDAATE': 'UPDATE', 'UDPATE': 'UPDATE',
+    'DELETEE': 'DELETE', 'DELEET': 'DELETE'
+}
+
+
+def _scan_balance(sql_text):
+    """
+    Tally parentheses outside string literals, quoted identifiers and comments.
+    
+    Returns (open_parens, close_parens, unclosed_at), where unclosed_at is the
+    offset of the opening ', " or /* of a span still open at the end of the
+    text, or -1. Parentheses from that point on are not counted.
+    """
+    if len(sql_text) > _NUMBA_MIN_LENGTH and _load_native_scanner():
+        raw = sql_text.encode('utf-8', 'surrogatepass')
+        open_parens, close_parens, unclosed_at = _scan_balance_native(
+            np.frombuffer(raw, dtype=np.uint8)
+        )
+        if unclosed_at > 0 and len(raw) != len(sql_text):
+            # Byte offset back to a character offset
+            unclosed_at = len(raw[:unclosed_at].decode('utf-8', 'surrogatepass'))
+        return open_parens, close_parens, unclosed_at
+    
+    # Common case: drop every closed span in one C-level pass and count the rest
+    if ("'" in sql_text or '"' in sql_text
+            or '--' in sql_text or '/*' in sql_text):
+        if sql_text.find('/*', sql_text.rfind('*/') + 1) != -1:
+            # A /* with no */ after it: the regex would rescan to the end of
+            # the text from every later /*, so go straight to the walk
+            return _scan_balance_exact(sql_text)
+        code = _LITERAL_SPAN_RE.sub(' ', sql_text)
+    else:
+        code = sql_text
+    if "'" not in code and '"' not in code and '/*' not in code:
+        if len(code) >= _TRANSLATE_MIN_LENGTH and code.isascii():
+            parens = code.encode('ascii').translate(None, _NON_PAREN_BYTES)
+            return parens.count(b'('), parens.count(b')'), -1
+        return code.count('('), code.count(')'), -1
+    
+    # An opener survived, so some span is unterminated; walk the openers to
+    # find where it starts and count only the parens before it
+    return _scan_balance_exact(sql_text)
+
+
+def _scan_balance_exact(sql_text):
+    """Opener-by-opener version of _scan_balance() that locates an open span."""
+    length = len(sql_text)
+    open_parens = close_parens = 0
+    pos = 0
+    
+    # One finditer pass; openers inside an already skipped span are ignored
+    for match in _LITERAL_START_RE.finditer(sql_text):
+        start = match.start()
+        if start < pos:
+            continue
+        
+        open_parens += sql_text.count('(', pos, start)
+        close_parens += sql_text.count(')', pos, start)
+        
+        opener = match.group()
+        if opener == "'":
+            end = sql_text.find("'", start + 1)
+            # A doubled '' inside a literal is an escaped quote
+            while end != -1 and sql_text.startswith("'", end + 1):
+                end = sql_text.find("'", end + 2)
+            if end == -1:
+                return open_parens, close_parens, start
+            pos = end + 1
+        elif opener == '"':
+            end = sql_text.find('"', start + 1)
+            if end == -1:
+                return open_parens, close_parens, start
+            pos = end + 1
+        elif opener == '--':
+            end = sql_text.find('\n', start + 2)
+            pos = end + 1 if end != -1 else length
+        else:
+            end = sql_text.find('*/', start + 2)
+            if end == -1:
+                return open_parens, close_parens, start
+            pos = end + 2
+    
+    open_parens += sql_text.count('(', pos)
+    close_parens += sql_text.count(')', pos)
+    return open_parens, close_parens, -1
+
+
+def _scan_balance_bytes(buf):
+    """
+    Byte-level _scan_balance_exact() over UTF-8 input, for the numba kernel.
+    
+    Every delimiter is ASCII and never occurs inside a multi-byte UTF-8
+    sequence, so scanning bytes gives the same tallies as scanning characters.
+    """
+    n = buf.shape[0]
+    open_parens = 0
+    close_parens = 0
+    i = 0
+    while i < n:
+        c = buf[i]
+        if c == 39:  # ' literal, with '' as an escaped quote
+            j = i + 1
+            while True:
+                if j >= n:
+                    return open_parens, close_parens, i
+                if buf[j] == 39:
+                    if j + 1 < n and buf[j + 1] == 39:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            i = j + 1
+        elif c == 34:  # " quoted identifier
+            j = i + 1
+            while j < n and buf[j] != 34:
+                j += 1
+            if j >= n:
+                return open_parens, close_parens, i
+            i = j + 1
+        elif c == 45 and i + 1 < n and buf[i + 1] == 45:  # -- line comment
+            j = i + 2
+            while j < n and buf[j] != 10:
+                j += 1
+            i = j + 1
+        elif c == 47 and i + 1 < n and buf[i + 1] == 42:  # /* block comment */
+            j = i + 2
+            while j + 1 < n and not (buf[j] == 42 and buf[j + 1] == 47):
+                j += 1
+            if j + 1 >= n:
+                return open_parens, close_parens, i
+            i = j + 2
+        else:
+            if c == 40:
+                open_parens += 1
+            elif c == 41:
+                close_parens += 1
+            i += 1
+    return open_parens, close_parens, -1
+
+
+# numba is optional and slow to import, so the kernel is compiled on the first
+# input over _NUMBA_MIN_LENGTH (app.py triggers that before gunicorn forks);
+# None until tried, False if unavailable
+_scan_balance_native = None
+_native_scanner_lock = Lock()
+
+
+def _load_native_scanner():
+    """Import numba and JIT-compile the balance scanner, once."""
+    global _scan_balance_native
+    if _scan_balance_native is None:
+        with _native_scanner_lock:
+            if _scan_balance_native is None:
+                _scan_balance_native = _compile_native_scanner()
+    return _scan_balance_native
+
+
+def _compile_native_scanner():
+    """Return the compiled kernel, or False when numba can't provide one."""
+    global np
+    try:
+        import numpy as np
+        from numba import njit, types as nb_types
+        from numba.core.errors import NumbaError
+    except ImportError:
+        return False
+    
+    if not isinstance(_scan_balance_bytes, FunctionType):
+        # Inside the Cython build, where there is no bytecode to compile
+        return False
+    
+    try:
+        return njit(
+            nb_types.UniTuple(nb_types.int64, 3)(
+                nb_types.Array(nb_types.uint8, 1, 'C', readonly=True)
+            ),
+            nogil=True
+        )(_scan_balance_bytes)
+    except NumbaError:
+        return False
+
+
+class SQLFormatter:
+    # Results are memoized per instance; longer inputs bypass the caches
+    MAX_CACHED_SQL_LENGTH = 64_000
+    
+    def __init__(self, cache_size=512):
+        # Read-only, so calls without options can use it without copying
+        self.default_options = MappingProxyType({
             'keyword_case': 'upper',  # 'upper', 'lower', 'capitalize'
             'identifier_case': None,  # None, 'upper', 'lower', 'capitalize' 
             'strip_comments': False,
@@ -19,8 +387,30 @@ class SQLFormatter:
             'comma_first': False,
             'reindent': True,
             'strip_whitespace': True
+        })
+        self._default_options_key = tuple(sorted(self.default_options.items()))
+        
+        # Keyed on (sql_text, sorted options tuple), then sql_text alone
+        self._format_cached = lru_cache(maxsize=cache_size)(self._format_uncached)
+        self._validate_cached = lru_cache(maxsize=cache_size)(self._validate_uncached)
+        self._minify_cached = lru_cache(maxsize=cache_size)(self._minify_uncached)
+    
+    def cache_info(self):
+        """Return the lru_cache counters for the result and token caches."""
+        return {
+            'format': self._format_cached.cache_info(),
+            'validate': self._validate_cached.cache_info(),
+            'minify': self._minify_cached.cache_info(),
+            'tokens': _lex_cached.cache_info()
         }
     
+    def clear_caches(self):
+        """Drop all memoized results."""
+        self._format_cached.cache_clear()
+        self._validate_cached.cache_clear()
+        self._minify_cached.cache_clear()
+        _lex_cached.cache_clear()
+    
     def format_sql(self, sql_text, options=None):
         """
         Format SQL text with given options.
@@ -38,6 +428,62 @@ class SQLFormatter:
                 'formatted_length': int
             }
         """
+        format_options, options_key = self._merge_options(options)
+        return self._format_merged(sql_text, format_options, options_key)
+    
+    def format_sql_batch(self, sql_list, options=None):
+        """
+        Format several SQL strings with the same options.
+        
+        Options are merged once for the whole batch and each distinct input
+        is formatted once.
+        
+        Args:
+            sql_list (list of str): SQL texts to format
+            options (dict): Formatting options, uses defaults if None
+            
+        Returns:
+            list of dict: format_sql() results, in input order
+        """
+        format_options, options_key = self._merge_options(options)
+        results = {}
+        for sql_text in sql_list:
+            if sql_text not in results:
+                results[sql_text] = self._format_merged(sql_text, format_options, options_key)
+        return [dict(results[sql_text]) for sql_text in sql_list]
+    
+    def options_key(self, options=None):
+        """
+        Return the canonical, hashable cache key for an options dict.
+        
+        Options are merged over default_options and unknown names are dropped,
+        so ``{}``, ``{'keyword_case': 'upper'}`` and the same dict in a
+        different key order all share one key. Returns None when an option
+        value is unhashable and the result can't be cached.
+        """
+        return self._merge_options(options)[1]
+    
+    def _merge_options(self, options):
+        """Merge options over the defaults; the cache key is None if unhashable."""
+        if not options:
+            return self.default_options, self._default_options_key
+        
+        # Walk the pre-sorted defaults, so the merged dict is already in key order
+        format_options = {}
+        for name, default in self._default_options_key:
+            value = options.get(name, default)
+            if value.__class__ is str:
+                value = _INTERNED_VALUES.get(value, value)
+            format_options[name] = value
+        try:
+            options_key = tuple(format_options.items())
+            hash(options_key)
+        except TypeError:
+            options_key = None  # unhashable option value; format uncached
+        return format_options, options_key
+    
+    def _format_merged(self, sql_text, format_options, options_key):
+        """Format with already merged options, through the cache when possible."""
         if not sql_text or not sql_text.strip():
             return {
                 'formatted_sql': '',
@@ -47,25 +493,27 @@ class SQLFormatter:
                 'formatted_length': 0
             }
         
+        if options_key is None or len(sql_text) > self.MAX_CACHED_SQL_LENGTH:
+            result = self._format_uncached(sql_text, options_key, format_options)
+        else:
+            result = self._format_cached(sql_text, options_key)
+        return dict(result)
+    
+    def _format_uncached(self, sql_text, options_key, format_options=None):
+        """Run sqlparse and the custom pass; options come from the key when cached."""
+        if format_options is None:
+            format_options = dict(options_key)
+        
         try:
-            # Merge provided options with defaults
-            format_options = self.default_options.copy()
-            if options:
-                format_options.update(options)
-            
-            # Basic formatting with sqlparse
-            formatted = sqlparse.format(
-                sql_text,
-                keyword_case=format_options['keyword_case'],
-                identifier_case=format_options['identifier_case'],
-                strip_comments=format_options['strip_comments'],
-                indent_tabs=format_options['indent_tabs'],
-                indent_width=format_options['indent_width'],
-                wrap_after=format_options['wrap_after'],
-                comma_first=format_options['comma_first'],
-                reindent=format_options['reindent'],
-                strip_whitespace=format_options['strip_whitespace']
-            )
+            # Basic formatting with sqlparse; a hashable options set reuses its
+            # validated sqlparse options across different SQL strings
+            if options_key is not None:
+                render = _get_format_fn(options_key)
+            else:
+                render = partial(_render, **{
+                    name: format_options[name] for name in _SQLPARSE_OPTION_NAMES
+                })
+            formatted = render(sql_text)
             
             # Additional custom formatting
             formatted = self._apply_custom_formatting(formatted, format_options)
@@ -89,16 +537,11 @@ class SQLFormatter:
     
     def _apply_custom_formatting(self, sql_text, options):
         """Apply additional custom formatting rules."""
-        lines = sql_text.split('\n')
-        formatted_lines = []
-        
-        for line in lines:
-            # Remove excessive whitespace but preserve intentional indentation
-            stripped = line.rstrip()
-            if stripped:  # Only add non-empty lines
-                formatted_lines.append(stripped)
-        
-        return '\n'.join(formatted_lines)
+        # Remove trailing whitespace but preserve intentional indentation, and
+        # drop lines that end up empty; map() keeps the per-line rstrip in C.
+        # split('\n') rather than splitlines(): the latter also breaks on \r,
+        # \f and U+2028 inside literals, and is no faster here
+        return '\n'.join([line for line in map(str.rstrip, sql_text.split('\n')) if line])
     
     def validate_sql(self, sql_text):
         """
@@ -123,110 +566,146 @@ class SQLFormatter:
                 'error_details': []
             }
         
+        if len(sql_text) > self.MAX_CACHED_SQL_LENGTH:
+            return self._copy_validation(self._validate_uncached(sql_text))
+        
+        # Copy the cached result so callers can't mutate the shared lists
+        return self._copy_validation(self._validate_cached(sql_text))
+    
+    def validate_sql_batch(self, sql_list):
+        """
+        Validate several SQL strings, running each distinct input once.
+        
+        Args:
+            sql_list (list of str): SQL texts to validate
+            
+        Returns:
+            list of dict: validate_sql() results, in input order
+        """
+        results = {}
+        for sql_text in sql_list:
+            if sql_text not in results:
+                results[sql_text] = self.validate_sql(sql_text)
+        return [self._copy_validation(results[sql_text]) for sql_text in sql_list]
+    
+    @staticmethod
+    def _copy_validation(result):
+        """Copy a validation result, turning its error details into dicts."""
+        return {
+            'is_valid': result['is_valid'],
+            'errors': list(result['errors']),
+            'warnings': list(result['warnings']),
+            'error_details': [
+                detail._asdict() if isinstance(detail, ErrorDetail) else dict(detail)
+                for detail in result['error_details']
+            ]
+        }
+    
+    def _validate_uncached(self, sql_text):
+        """Apply the validation rules to non-empty SQL text."""
         try:
             errors = []
             warnings = []
             error_details = []
             
-            # Direct string-based validation (more reliable than token parsing)
-            sql_upper = sql_text.upper().strip()
+            # Direct string-based validation (more reliable than token parsing).
+            # Stripped and upper-cased forms are computed once for all rules.
+            stripped = sql_text.strip()
+            upper_text = sql_text.upper()
+            sql_upper = upper_text.strip()
             
-            # Rule 1: SELECT with WHERE but no FROM
-            if sql_upper.startswith('SELECT'):
-                has_where = ' WHERE ' in sql_upper
-                has_from = ' FROM ' in sql_upper
-                
-                if has_where and not has_from:
+            # Rule 3: Keyword typos. Checked first since it's a single dict lookup:
+            # a misspelled command can't also start with SELECT, so Rules 1 and 2
+            # (and their regex scans) are skipped whenever it matches.
+            first_word = sql_upper.split(None, 1)[0] if sql_upper else ''
+            
+            if first_word in _COMMAND_TYPOS:
+                errors.append(f'Typo in SQL keyword: "{first_word}" (did you mean "{_COMMAND_TYPOS[first_word]}"?)')
+                error_details.append(ErrorDetail(
+                    type='keyword_typo',
+                    message=f'Typo: "{first_word}" should be "{_COMMAND_TYPOS[first_word]}"',
+                    position=0,
+                    token=first_word
+                ))
+            
+            # Rules 1 and 2 only apply without FROM, so WHERE is scanned for lazily
+            elif sql_upper.startswith('SELECT') and ' FROM ' not in sql_upper:
+                # Rule 1: SELECT with WHERE but no FROM
+                if ' WHERE ' in sql_upper:
                     errors.append('SELECT with WHERE clause must have FROM clause')
-                    error_details.append({
-                        'type': 'missing_from_with_where',
-                        'message': 'SELECT statement has WHERE clause but missing FROM clause',
-                        'position': sql_text.upper().find('WHERE'),
-                        'token': 'FROM'
-                    })
+                    error_details.append(ErrorDetail(
+                        type='missing_from_with_where',
+                        message='SELECT statement has WHERE clause but missing FROM clause',
+                        position=upper_text.find('WHERE'),
+                        token='FROM'
+                    ))
                 
                 # Rule 2: SELECT with column-like names but no FROM
-                elif not has_from:
-                    # Extract the SELECT part
+                else:
+                    # Extract the SELECT part; Rule 1 already covers any WHERE
                     select_part = sql_text[6:].strip()  # Remove "SELECT"
-                    if ' WHERE ' in select_part.upper():
-                        select_part = select_part[:select_part.upper().find(' WHERE ')]
                     
-                    # Look for identifiers that could be column names
-                    import re
-                    identifiers = re.findall(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b', select_part)
-                    # Filter out common SQL functions and literals
-                    sql_functions = ['NOW', 'COUNT', 'SUM', 'AVG', 'MAX', 'MIN', 'CURRENT_DATE', 
-                                   'CURRENT_TIME', 'CURRENT_TIMESTAMP', 'NULL', 'TRUE', 'FALSE',
-                                   'CONCAT', 'LENGTH', 'UPPER', 'LOWER', 'TRIM', 'SUBSTRING']
-                    column_like = [id for id in identifiers if id.upper() not in sql_functions]
+                    # An obvious function/expression clears the rule, so check that
+                    # before scanning; otherwise look for identifiers that could be
+                    # column names, skipping common SQL functions and literals and
+                    # stopping at the three the message names
+                    if _EXPR_RE.search(select_part):
+                        column_like = []
+                    else:
+                        column_like = list(islice(
+                            (match.group() for match in _IDENT_RE.finditer(select_part)
+                             if match.group().upper() not in _SQL_FUNCTIONS),
+                            3
+                        ))
                     
-                    # If we found potential column names and it's not obviously a function/expression
-                    if len(column_like) > 0 and not re.search(r'\d+\s*[\+\-\*\/]|\(\)', select_part):
+                    if column_like:
                         errors.append('SELECT appears to reference column names but missing FROM clause')
-                        error_details.append({
-                            'type': 'missing_from_columns',
-                            'message': f'SELECT appears to reference columns ({", ".join(column_like[:3])}) but missing FROM clause',
-                            'position': 6,
-                            'token': 'FROM'
-                        })
-            
-            # Rule 3: Keyword typos
-            first_word = sql_text.strip().split()[0].upper() if sql_text.strip() else ''
-            keyword_typos = {
-                'SELCT': 'SELECT', 'SLEECT': 'SELECT', 'SLECT': 'SELECT',
-                'INSERTT': 'INSERT', 'INSRT': 'INSERT',
-                'UPDAATE': 'UPDATE', 'UDPATE': 'UPDATE',
-                'DELETEE': 'DELETE', 'DELEET': 'DELETE'
-            }
-            
-            if first_word in keyword_typos:
-                errors.append(f'Typo in SQL keyword: "{first_word}" (did you mean "{keyword_typos[first_word]}"?)')
-                error_details.append({
-                    'type': 'keyword_typo',
-                    'message': f'Typo: "{first_word}" should be "{keyword_typos[first_word]}"',
-                    'position': 0,
-                    'token': first_word
-                })
+                        error_details.append(ErrorDetail(
+                            type='missing_from_columns',
+                            message=f'SELECT appears to reference columns ({", ".join(column_like)}) but missing FROM clause',
+                            position=6,
+                            token='FROM'
+                        ))
             
             # Rule 4: INSERT without INTO
             if sql_upper.startswith('INSERT') and ' INTO ' not in sql_upper:
                 errors.append('INSERT statement missing INTO clause')
-                error_details.append({
-                    'type': 'missing_into',
-                    'message': 'INSERT statement missing INTO clause',
-                    'position': 6,
-                    'token': 'INTO'
-                })
+                error_details.append(ErrorDetail(
+                    type='missing_into',
+                    message='INSERT statement missing INTO clause',
+                    position=6,
+                    token='INTO'
+                ))
+            
+            # Tallies for Rules 5 and 6, ignoring literal and comment contents
+            open_parens, close_parens, unclosed_at = _scan_balance(sql_text)
             
             # Rule 5: Unmatched parentheses
-            open_parens = sql_text.count('(')
-            close_parens = sql_text.count(')')
             if open_parens != close_parens:
                 if open_parens > close_parens:
                     errors.append(f'{open_parens - close_parens} unmatched opening parenthesis(es)')
                 else:
                     errors.append(f'{close_parens - open_parens} unmatched closing parenthesis(es)')
-                error_details.append({
-                    'type': 'unmatched_parentheses',
-                    'message': f'Unmatched parentheses: {open_parens} opening, {close_parens} closing',
-                    'position': 0,
-                    'token': '(' if open_parens > close_parens else ')'
-                })
+                error_details.append(ErrorDetail(
+                    type='unmatched_parentheses',
+                    message=f'Unmatched parentheses: {open_parens} opening, {close_parens} closing',
+                    position=0,
+                    token='(' if open_parens > close_parens else ')'
+                ))
             
-            # Rule 6: Unmatched quotes
-            single_quotes = sql_text.count("'")
-            if single_quotes % 2 != 0:
-                errors.append('Unmatched single quote')
-                error_details.append({
-                    'type': 'unmatched_quote',
-                    'message': 'Unmatched single quote',
-                    'position': sql_text.rfind("'"),
-                    'token': "'"
-                })
+            # Rule 6: Unmatched quotes and unterminated block comments
+            if unclosed_at != -1:
+                detail_type, message, token = _UNTERMINATED_SPANS[sql_text[unclosed_at]]
+                errors.append(message)
+                error_details.append(ErrorDetail(
+                    type=detail_type,
+                    message=message,
+                    position=unclosed_at,
+                    token=token
+                ))
             
             # Rule 7: Missing semicolon (warning)
-            if not sql_text.strip().endswith(';'):
+            if not stripped.endswith(';'):
                 warnings.append('Statement may be missing semicolon')
             
             return {
@@ -248,264 +727,6 @@ class SQLFormatter:
                 }]
             }
     
-    def _validate_statement_structure(self, tokens, meaningful_tokens, statement_idx):
-        """Validate basic SQL statement structure."""
-        errors = []
-        warnings = []
-        details = []
-        
-        if not meaningful_tokens:
-            return errors, warnings, details
-        
-        first_token = meaningful_tokens[0]
-        
-        # Check for common SQL keyword typos
-        first_token_upper = first_token.value.upper()
-        keyword_typos = {
-            'SELCT': 'SELECT',
-            'SLEECT': 'SELECT',
-            'SLECT': 'SELECT',
-            'SELECCT': 'SELECT',
-            'INSERTT': 'INSERT',
-            'INSRT': 'INSERT',
-            'UPDAATE': 'UPDATE',
-            'UDPATE': 'UPDATE',
-            'DELETEE': 'DELETE',
-            'DELEET': 'DELETE',
-            'FORM': 'FROM',
-            'FRON': 'FROM',
-            'WHREE': 'WHERE',
-            'WHER': 'WHERE',
-            'WEHERE': 'WHERE',
-            'GROPU': 'GROUP',
-            'GRUP': 'GROUP',
-            'ORDERR': 'ORDER',
-            'ODER': 'ORDER',
-            'HAVNG': 'HAVING',
-            'HAVIG': 'HAVING'
-        }
-        
-        if first_token_upper in keyword_typos:
-            errors.append(f'Statement {statement_idx + 1}: Possible typo in SQL keyword: "{first_token.value}" (did you mean "{keyword_typos[first_token_upper]}"?)')
-            details.append({
-                'type': 'keyword_typo',
-                'message': f'Possible typo: "{first_token.value}" should be "{keyword_typos[first_token_upper]}"',
-                'position': 0,
-                'token': first_token.value
-            })
-        
-        # Check if it starts with a valid SQL keyword
-        valid_start_keywords = ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CREATE', 'DROP', 'ALTER', 'WITH', 'EXPLAIN', 'ANALYZE', 'SHOW', 'DESCRIBE', 'USE']
-        if (first_token.ttype in (T.Keyword, T.Keyword.DML, T.Keyword.DDL) or 
-            first_token_upper in valid_start_keywords or
-            first_token_upper in keyword_typos.values()):
-            pass  # Valid start
-        elif first_token_upper not in valid_start_keywords and first_token_upper not in keyword_typos:
-            errors.append(f'Statement {statement_idx + 1}: Invalid or missing SQL command: "{first_token.value}"')
-            details.append({
-                'type': 'invalid_command',
-                'message': f'Statement starts with invalid keyword: "{first_token.value}"',
-                'position': 0,
-                'token': first_token.value
-            })
-        
-        # Check for typos in other keywords throughout the statement
-        for i, token in enumerate(meaningful_tokens):
-            token_upper = token.value.upper()
-            if token_upper in keyword_typos and token_upper != first_token_upper:  # Don't double-report first token
-                errors.append(f'Statement {statement_idx + 1}: Possible typo in keyword: "{token.value}" (did you mean "{keyword_typos[token_upper]}"?)')
-                details.append({
-                    'type': 'keyword_typo',
-                    'message': f'Possible typo: "{token.value}" should be "{keyword_typos[token_upper]}"',
-                    'position': i,
-                    'token': token.value
-                })
-        
-        # Check for common syntax issues
-        for i, token in enumerate(meaningful_tokens):
-            # Check for double keywords
-            if i > 0 and token.ttype in (T.Keyword, T.Keyword.DML, T.Keyword.DDL):
-                prev_token = meaningful_tokens[i-1]
-                if prev_token.ttype in (T.Keyword, T.Keyword.DML, T.Keyword.DDL):
-                    if token.value.upper() not in ['BY', 'ON', 'AS', 'OR', 'AND', 'NOT', 'IN', 'IS', 'NULL', 'JOIN', 'OUTER', 'INNER', 'LEFT', 'RIGHT', 'FULL']:
-                        errors.append(f'Statement {statement_idx + 1}: Unexpected keyword "{token.value}" after "{prev_token.value}"')
-                        details.append({
-                            'type': 'unexpected_keyword',
-                            'message': f'Unexpected keyword "{token.value}" after "{prev_token.value}"',
-                            'position': i,
-                            'token': token.value
-                        })
-            
-            # Check for missing operators between identifiers
-            if (token.ttype in (T.Name, T.Literal.String.Single, T.Literal.Number.Integer, T.Literal.Number.Float) and 
-                i > 0 and meaningful_tokens[i-1].ttype in (T.Name, T.Literal.String.Single, T.Literal.Number.Integer, T.Literal.Number.Float)):
-                # Check if there should be an operator between them
-                if token.value.upper() not in ['AS', 'AND', 'OR', 'NOT', 'IN', 'IS']:
-                    warnings.append(f'Statement {statement_idx + 1}: Missing operator between "{meaningful_tokens[i-1].value}" and "{token.value}"')
-        
-        return errors, warnings, details
-    
-    def _check_parentheses(self, tokens, statement_idx):
-        """Check for unmatched parentheses."""
-        errors = []
-        details = []
-        paren_stack = []
-        
-        for i, token in enumerate(tokens):
-            if token.ttype is T.Punctuation:
-                if token.value == '(':
-                    paren_stack.append(i)
-                elif token.value == ')':
-                    if not paren_stack:
-                        errors.append(f'Statement {statement_idx + 1}: Unmatched closing parenthesis')
-                        details.append({
-                            'type': 'unmatched_paren',
-                            'message': 'Unmatched closing parenthesis',
-                            'position': i,
-                            'token': ')'
-                        })
-                    else:
-                        paren_stack.pop()
-        
-        if paren_stack:
-            errors.append(f'Statement {statement_idx + 1}: {len(paren_stack)} unmatched opening parenthesis(es)')
-            for pos in paren_stack:
-                details.append({
-                    'type': 'unmatched_paren',
-                    'message': 'Unmatched opening parenthesis',
-                    'position': pos,
-                    'token': '('
-                })
-        
-        return {'errors': errors, 'details': details}
-    
-    def _check_quotes(self, sql_text, statement_idx):
-        """Check for unmatched quotes."""
-        errors = []
-        details = []
-        
-        # Simple quote checking
-        single_quotes = sql_text.count("'")
-        double_quotes = sql_text.count('"')
-        
-        if single_quotes % 2 != 0:
-            errors.append(f'Statement {statement_idx + 1}: Unmatched single quote')
-            details.append({
-                'type': 'unmatched_quote',
-                'message': 'Unmatched single quote',
-                'position': sql_text.rfind("'"),
-                'token': "'"
-            })
-        
-        if double_quotes % 2 != 0:
-            errors.append(f'Statement {statement_idx + 1}: Unmatched double quote')
-            details.append({
-                'type': 'unmatched_quote',
-                'message': 'Unmatched double quote',
-                'position': sql_text.rfind('"'),
-                'token': '"'
-            })
-        
-        return {'errors': errors, 'details': details}
-    
-    def _check_incomplete_statements(self, meaningful_tokens, statement_idx):
-        """Check for incomplete SQL statements."""
-        errors = []
-        warnings = []
-        details = []
-        
-        if not meaningful_tokens:
-            return {'errors': errors, 'warnings': warnings, 'details': details}
-        
-        first_token = meaningful_tokens[0].value.upper()
-        last_token = meaningful_tokens[-1]
-        
-        # Check for missing semicolon (warning, not error)
-        if last_token.value != ';':
-            warnings.append(f'Statement {statement_idx + 1}: Missing semicolon at end of statement')
-        
-        # Check for incomplete SELECT statements
-        if first_token == 'SELECT':
-            has_from = any(token.value.upper() == 'FROM' for token in meaningful_tokens)
-            has_where = any(token.value.upper() == 'WHERE' for token in meaningful_tokens)
-            
-            # If there's a WHERE clause but no FROM, it's definitely an error
-            if has_where and not has_from:
-                errors.append(f'Statement {statement_idx + 1}: SELECT with WHERE clause must have FROM clause')
-                details.append({
-                    'type': 'missing_from_with_where',
-                    'message': 'SELECT statement has WHERE clause but missing FROM clause - this is invalid SQL',
-                    'position': next(i for i, token in enumerate(meaningful_tokens) if token.value.upper() == 'WHERE'),
-                    'token': 'FROM'
-                })
-            # If selecting what looks like column names without FROM
-            elif not has_from and len(meaningful_tokens) > 2:
-                # Check if it looks like table columns (identifiers that aren't functions)
-                select_part = []
-                for i, token in enumerate(meaningful_tokens[1:], 1):  # Skip SELECT
-                    if token.value.upper() in ['WHERE', 'GROUP', 'ORDER', 'HAVING', 'LIMIT', 'UNION']:
-                        break
-                    if token.value != ',':
-                        select_part.append(token)
-                
-                # Look for patterns that suggest column names
-                likely_columns = False
-                for token in select_part:
-                    if (token.ttype in (T.Name, None) and 
-                        '(' not in str(token.value) and  # Not a function
-                        token.value.upper() not in ['NULL', 'TRUE', 'FALSE'] and  # Not a literal
-                        not token.value.isdigit() and  # Not a number
-                        "'" not in str(token.value)):  # Not a string
-                        likely_columns = True
-                        break
-                
-                if likely_columns:
-                    errors.append(f'Statement {statement_idx + 1}: SELECT statement appears to select column names but missing FROM clause')
-                    details.append({
-                        'type': 'missing_from_columns',
-                        'message': 'SELECT statement appears to select column names but missing FROM clause',
-                        'position': 1,
-                        'token': 'FROM'
-                    })
-        
-        # Check for incomplete INSERT statements
-        elif first_token == 'INSERT':
-            has_into = any(token.value.upper() == 'INTO' for token in meaningful_tokens)
-            has_values = any(token.value.upper() in ['VALUES', 'SELECT'] for token in meaningful_tokens)
-            
-            if not has_into:
-                errors.append(f'Statement {statement_idx + 1}: INSERT statement missing INTO clause')
-                details.append({
-                    'type': 'missing_into',
-                    'message': 'INSERT statement missing INTO clause',
-                    'position': 1,
-                    'token': 'INTO'
-                })
-            
-            if not has_values:
-                errors.append(f'Statement {statement_idx + 1}: INSERT statement missing VALUES or SELECT clause')
-                details.append({
-                    'type': 'missing_values',
-                    'message': 'INSERT statement missing VALUES or SELECT clause',
-                    'position': len(meaningful_tokens) - 1,
-                    'token': 'VALUES'
-                })
-        
-        # Check for incomplete UPDATE statements
-        elif first_token == 'UPDATE':
-            has_set = any(token.value.upper() == 'SET' for token in meaningful_tokens)
-            
-            if not has_set:
-                errors.append(f'Statement {statement_idx + 1}: UPDATE statement missing SET clause')
-                details.append({
-                    'type': 'missing_set',
-                    'message': 'UPDATE statement missing SET clause',
-                    'position': len(meaningful_tokens) - 1,
-                    'token': 'SET'
-                })
-        
-        return {'errors': errors, 'warnings': warnings, 'details': details}
-    
     def minify_sql(self, sql_text):
         """
         Minify SQL by removing unnecessary whitespace and comments.
@@ -516,32 +737,31 @@ class SQLFormatter:
         Returns:
             str: Minified SQL
         """
+        if len(sql_text) > self.MAX_CACHED_SQL_LENGTH:
+            return self._minify_uncached(sql_text)
+        return self._minify_cached(sql_text)
+    
+    def _minify_uncached(self, sql_text):
+        """Render sql_text without comments and collapse it onto one line."""
         try:
-            minified = sqlparse.format(
+            minified = _render(
                 sql_text,
                 strip_comments=True,
                 strip_whitespace=True,
                 reindent=False
             )
             
-            # Further compression - remove extra spaces
-            lines = minified.split('\n')
-            compressed_lines = []
-            
-            for line in lines:
-                stripped = ' '.join(line.split())  # Normalize whitespace
-                if stripped:
-                    compressed_lines.append(stripped)
-            
-            return ' '.join(compressed_lines)
+            # Further compression - collapse every whitespace run, newlines
+            # included, to one space in a single C-level split/join
+            return ' '.join(minified.split())
             
         except Exception:
             # Return original if minification fails
             return sql_text
     
     def get_sql_keywords(self):
-        """Return list of SQL keywords for syntax highlighting."""
-        return list(K.KEYWORDS.keys())
+        """Return SQL keywords for syntax highlighting, as a shared tuple."""
+        return _sql_keywords()
 
 
 # Example usage and testing
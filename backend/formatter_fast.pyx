@@ -0,0 +1,13 @@
+# cython: language_level=3
+"""
+Cython build of the SQL formatter.
+
+Compiles formatter.py unchanged into a C extension. app.py only uses it when
+SQL_FORMATTER_CYTHON=1 is set and the build is newer than formatter.py, and
+falls back to the pure-Python formatter otherwise.
+
+Build (from the backend directory):
+    cythonize -3 --inplace formatter_fast.pyx
+"""
+
+include "formatter.py"
@@ -9,6 +9,7 @@ class SQLFormatterAPI {
         this.timeout = 30000; // 30 seconds
         this.retryCount = 3;
         this.isOnline = true;
+        this.lastFormat = null; // { body, etag, result } of the last /api/format call
         
         // Initialize connection monitoring
         this.initConnectionMonitoring();
@@ -56,13 +57,23 @@ class SQLFormatterAPI {
                 const controller = new AbortController();
                 const timeoutId = setTimeout(() => controller.abort(), this.timeout);
 
+                const { onResponse, ...fetchOptions } = defaultOptions;
                 const response = await fetch(url, {
-                    ...defaultOptions,
+                    ...fetchOptions,
                     signal: controller.signal
                 });
 
                 clearTimeout(timeoutId);
 
+                if (onResponse) {
+                    onResponse(response);
+                }
+
+                // Conditional request whose cached result is still current
+                if (response.status === 304) {
+                    return null;
+                }
+
                 if (!response.ok) {
                     throw new Error(`HTTP ${response.status}: ${response.statusText}`);
                 }
@@ -96,18 +107,33 @@ class SQLFormatterAPI {
      */
     async formatSQL(sqlText, options = {}) {
         try {
-            const result = await this.makeRequest('/api/format', {
+            const body = JSON.stringify({
+                sql: sqlText,
+                options: options
+            });
+            const headers = { 'Content-Type': 'application/json' };
+            const cached = this.lastFormat;
+            if (cached && cached.body === body && cached.etag) {
+                headers['If-None-Match'] = cached.etag;
+            }
+
+            let etag = null;
+            let result = await this.makeRequest('/api/format', {
                 method: 'POST',
-                body: JSON.stringify({
-                    sql: sqlText,
-                    options: options
-                })
+                headers: headers,
+                body: body,
+                onResponse: (response) => { etag = response.headers.get('ETag'); }
             });
 
+            if (result === null) {
+                return cached.result;
+            }
+
             if (!result.success) {
                 throw new APIError(result.error || 'Format operation failed', 'FORMAT_ERROR');
             }
 
+            this.lastFormat = { body, etag, result };
             return result;
 
         } catch (error) {
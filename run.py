@@ -3,36 +3,30 @@ SQL Formatter Application Launcher
 Starts the Flask server and opens the application in the default browser.
 """
 
+import importlib.util
 import os
 import sys
 import time
-import threading
-import webbrowser
 from pathlib import Path
 
 # Add backend directory to Python path
 backend_dir = Path(__file__).parent / 'backend'
 sys.path.insert(0, str(backend_dir))
 
-try:
-    from backend.app import app
-    from backend.config import config
-except ImportError as e:
-    print(f"Error importing application: {e}")
-    print("Make sure you're in the project root directory and have installed dependencies:")
-    print("  pip install -r requirements.txt")
-    sys.exit(1)
+# Same module object backend.app imports, so launcher overrides are shared.
+# The app itself (Flask, sqlparse, ...) is imported in main(), so --help and
+# argument errors don't pay for it.
+from config import config
 
 
 def check_dependencies():
     """Check if required dependencies are installed."""
-    required_packages = ['flask', 'sqlparse', 'flask_cors']
+    required_packages = ['flask', 'sqlparse', 'flask_cors', 'flask_compress', 'orjson']
     missing_packages = []
     
+    # find_spec locates a package without running its top-level code
     for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
+        if importlib.util.find_spec(package) is None:
             missing_packages.append(package)
     
     if missing_packages:
@@ -51,10 +45,12 @@ def check_frontend_files():
     frontend_dir = Path(__file__).parent / 'frontend'
     required_files = ['index.html']
     
-    missing_files = []
-    for file in required_files:
-        if not (frontend_dir / file).exists():
-            missing_files.append(file)
+    # One directory listing instead of a stat() per required file
+    try:
+        present = {entry.name for entry in os.scandir(frontend_dir)}
+    except OSError:
+        present = set()
+    missing_files = [file for file in required_files if file not in present]
     
     if missing_files:
         print("⚠️  Frontend files not found:")
@@ -66,32 +62,50 @@ def check_frontend_files():
     return True
 
 
-def wait_for_server(host, port, timeout=30):
-    """Wait for the Flask server to start."""
+def wait_for_server(host, port, timeout=30, interval=0.01):
+    """Wait for the Flask server to start, probing every interval seconds."""
+    import errno
+    import select
     import socket
     
-    start_time = time.time()
-    while time.time() - start_time < timeout:
+    # connect_ex() codes for a non-blocking connect still in progress
+    pending = {errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, 'WSAEWOULDBLOCK', None)}
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex((host, port))
-            sock.close()
+            # A refused socket can't portably be reconnected, so each attempt
+            # gets its own; the with block closes it straight away
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.setblocking(False)
+                result = sock.connect_ex((host, port))
+                if result in pending:
+                    # Writable once the handshake completes or fails
+                    _, writable, _ = select.select([], [sock], [], 0.05)
+                    if writable:
+                        result = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    else:
+                        result = errno.ETIMEDOUT
             
             if result == 0:
                 return True
                 
-            time.sleep(0.5)
+            time.sleep(interval)
         except Exception:
-            time.sleep(0.5)
+            time.sleep(interval)
     
     return False
 
 
-def open_browser(url, delay=2):
-    """Open the application in the default browser after a delay."""
+def open_browser(url, host, port, timeout=30):
+    """Open the application in the default browser once the server is listening."""
+    import threading
+    import webbrowser
+    
     def _open():
-        time.sleep(delay)
+        if not wait_for_server(host, port, timeout):
+            print(f"Server did not start within {timeout}s; not opening a browser")
+            return
         try:
             print(f"🌐 Opening browser: {url}")
             webbrowser.open(url)
@@ -122,6 +136,7 @@ def print_usage_info():
     print("📡 AVAILABLE ENDPOINTS:")
     print(f"   Application:  {base_url}/")
     print(f"   Format SQL:   {base_url}/api/format")
+    print(f"   Batch Format: {base_url}/api/format/batch")
     print(f"   Validate SQL: {base_url}/api/validate")
     print(f"   Minify SQL:   {base_url}/api/minify")
     print(f"   Options:      {base_url}/api/options")
@@ -145,8 +160,17 @@ def main():
     # Check frontend files (warning only)
     check_frontend_files()
     
-    # Configure Flask app
-    app.config.from_object(config)
+    try:
+        from backend.app import app
+    except ImportError as e:
+        print(f"Error importing application: {e}")
+        print("Make sure you're in the project root directory and have installed dependencies:")
+        print("  pip install -r requirements.txt")
+        sys.exit(1)
+    
+    # Configure Flask app (backend.app owns the rest of its settings,
+    # including the request size limit)
+    app.config['DEBUG'] = config.DEBUG
     
     # Determine URL
     url = f"http://{config.HOST}:{config.PORT}"
@@ -156,7 +180,7 @@ def main():
     try:
         # Open browser automatically (unless disabled)
         if not os.environ.get('NO_BROWSER'):
-            open_browser(url, delay=1.5)
+            open_browser(url, config.HOST, config.PORT)
         
         print("🚀 Starting Flask server...")
         print(f"📱 Access the app at: {url}")
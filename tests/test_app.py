@@ -0,0 +1,329 @@
+"""Flask test-client checks for the API endpoints."""
+
+import gzip
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from conftest import BACKEND_DIR
+
+
+@pytest.fixture
+def client():
+    app_module.app.config['TESTING'] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def slow_format(monkeypatch):
+    """Slow format_sql down and record how many calls overlap."""
+    state = {'calls': [], 'running': 0, 'peak': 0}
+    lock = threading.Lock()
+    format_sql = app_module.sql_formatter.format_sql
+    
+    def wrapper(sql_text, options=None):
+        with lock:
+            state['calls'].append(sql_text)
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        try:
+            time.sleep(0.05)
+            return format_sql(sql_text, options)
+        finally:
+            with lock:
+                state['running'] -= 1
+    
+    monkeypatch.setattr(app_module.sql_formatter, 'format_sql', wrapper)
+    return state
+
+
+def test_batch_formats_items_in_order(client):
+    response = client.post('/api/format/batch', json={'items': [
+        {'sql': 'select a from t'},
+        {'sql': 'select b from t', 'options': {'keyword_case': 'lower'}},
+        {'sql': ''},
+        'not an object',
+        {'sql': 'select c from t', 'preset': 'compact'},
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results[0]['formatted_sql'] == 'SELECT a\nFROM t'
+    assert results[1]['formatted_sql'] == 'select b\nfrom t'
+    assert results[2] == {'success': False, 'error': app_module._ERR_NO_SQL}
+    assert results[3] == {'success': False, 'error': app_module._ERR_NO_SQL}
+    assert results[4]['success'] is True
+
+
+def test_batch_rejects_too_many_items(client):
+    items = [{'sql': 'select 1'}] * (app_module.MAX_BATCH_ITEMS + 1)
+    response = client.post('/api/format/batch', json={'items': items})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_batch_caps_items_in_flight(client, slow_format):
+    count = app_module.BATCH_MAX_IN_FLIGHT * 2 + 1
+    items = [{'sql': f'select {i} from batch_cap'} for i in range(count)]
+    response = client.post('/api/format/batch', json={'items': items})
+    assert response.status_code == 200
+    assert len(slow_format['calls']) == count
+    assert slow_format['peak'] <= app_module.BATCH_MAX_IN_FLIGHT
+
+
+def test_batch_duplicates_share_one_call(client, slow_format, monkeypatch):
+    monkeypatch.setattr(app_module, 'BATCH_MAX_IN_FLIGHT', 4)
+    items = [{'sql': 'select x from batch_dup'}] * 3
+    response = client.post('/api/format/batch', json={'items': items})
+    assert response.status_code == 200
+    assert slow_format['calls'] == ['select x from batch_dup']
+    assert len({r['formatted_sql'] for r in response.get_json()['results']}) == 1
+    assert app_module._inflight == {}
+
+
+def test_cache_stats_endpoint(client):
+    client.post('/api/format', json={'sql': 'select stats_col from t'})
+    body = client.get('/api/cache/stats').get_json()
+    assert body['success'] is True
+    assert set(body['caches']) == {'format', 'validate', 'minify', 'tokens'}
+    for stats in body['caches'].values():
+        assert set(stats) == {'hits', 'misses', 'hit_rate', 'maxsize', 'currsize'}
+    assert body['caches']['format']['currsize'] >= 1
+
+
+def test_options_and_health(client):
+    options = client.get('/api/options').get_json()
+    assert options['options'] == dict(app_module.sql_formatter.default_options)
+    assert set(options['presets']) == set(app_module.SQLFormatterConfig.FORMATTING_PRESETS)
+    assert client.get('/api/health').get_json()['status'] == 'healthy'
+
+
+def test_format_endpoint(client):
+    response = client.post('/api/format', json={'sql': 'select a,b from t where x=1'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    body = response.get_json()
+    assert body['success'] is True
+    assert body['formatted_sql'] == 'SELECT a,b\nFROM t\nWHERE x=1'
+
+
+def test_validate_endpoint(client):
+    response = client.post('/api/validate', json={'sql': "SELECT a FROM t WHERE b = 'x"})
+    assert response.status_code == 200
+    validation = response.get_json()['validation']
+    assert validation['is_valid'] is False
+    assert 'Unmatched single quote' in validation['errors']
+
+
+def test_format_accepts_raw_sql_body(client):
+    response = client.post('/api/format', data='select 1', content_type='application/sql')
+    assert response.status_code == 200
+    assert response.get_json()['formatted_sql'] == 'SELECT 1'
+
+
+def test_large_responses_are_compressed(client):
+    sql_text = 'select ' + ', '.join(f'col_{i}' for i in range(300)) + ' from t'
+    response = client.post('/api/format', json={'sql': sql_text},
+                           headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'col_299' in gzip.decompress(response.data).decode()
+    
+    small = client.post('/api/format', json={'sql': 'select 1'},
+                        headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+
+def test_equivalent_options_resolve_to_one_key():
+    _, default_key = app_module._resolve_options({})
+    assert app_module._resolve_options({'keyword_case': 'upper'})[1] == default_key
+    assert app_module._resolve_options({'indent_width': 4, 'reindent': True})[1] == default_key
+    assert app_module._resolve_options({'add_semicolon': True})[1] == default_key
+    assert (app_module._resolve_options({'reindent': False, 'keyword_case': 'lower'})[1]
+            == app_module._resolve_options({'keyword_case': 'lower', 'reindent': False})[1])
+    assert app_module._resolve_options({'keyword_case': 'lower'})[1] != default_key
+    assert app_module._resolve_options({'wrap_after': [80]})[1] is None
+
+
+def test_error_bodies(client):
+    response = client.post('/api/format', json={'options': {}})
+    assert response.status_code == 400
+    assert response.data == app_module._ERROR_PAYLOADS[app_module._ERR_NO_SQL]
+    
+    missing = client.get('/api/nope')
+    assert missing.status_code == 404
+    assert missing.get_json() == {'success': False, 'error': app_module._ERR_NOT_FOUND}
+
+
+def test_cors_is_limited_to_the_api(client):
+    origin = {'Origin': 'http://localhost:5000'}
+    preflight = client.options('/api/format', headers={
+        **origin, 'Access-Control-Request-Method': 'POST'
+    })
+    assert preflight.headers['Access-Control-Allow-Origin'] in ('*', 'http://localhost:5000')
+    assert preflight.headers['Access-Control-Max-Age'] == str(app_module.CORS_MAX_AGE)
+    
+    assert client.get('/api/health', headers=origin).headers['Access-Control-Allow-Origin'] == '*'
+    assert 'Access-Control-Allow-Origin' not in client.get('/css/style.css', headers=origin).headers
+
+
+def test_format_timeout(client, slow_format, monkeypatch):
+    monkeypatch.setattr(app_module.SQLFormatterConfig, 'VALIDATION_TIMEOUT', 0.01)
+    response = client.post('/api/format', json={'sql': 'select slow from t'})
+    assert response.status_code == 504
+    assert response.data == app_module._ERROR_PAYLOADS[app_module._ERR_TIMEOUT]
+    # The abandoned call still finishes on the pool; let it drain
+    for future in list(app_module._inflight.values()):
+        future.result()
+
+
+def test_single_flight_collapses_concurrent_calls(slow_format):
+    opts_key = app_module.sql_formatter.options_key()
+    results = []
+    
+    def worker():
+        results.append(app_module._format_single_flight('select sf from t', None, opts_key))
+    
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert slow_format['calls'] == ['select sf from t']
+    assert [r['formatted_sql'] for r in results] == ['SELECT sf\nFROM t'] * 4
+    assert app_module._inflight == {}
+
+
+@pytest.mark.parametrize('preset', sorted(app_module.SQLFormatterConfig.FORMATTING_PRESETS))
+def test_format_preset_matches_explicit_options(client, preset):
+    sql_text = 'select a, b from t where x = 1 order by a'
+    options = app_module.SQLFormatterConfig.FORMATTING_PRESETS[preset]
+    by_preset = client.post('/api/format', json={'sql': sql_text, 'preset': preset})
+    by_options = client.post('/api/format', json={'sql': sql_text, 'options': options})
+    assert by_preset.status_code == 200
+    assert by_preset.get_json() == by_options.get_json()
+    assert by_preset.headers['ETag'] == by_options.headers['ETag']
+
+
+def test_format_preset_with_override(client):
+    response = client.post('/api/format', json={
+        'sql': 'select a from t', 'preset': 'legacy', 'options': {'keyword_case': 'lower'}
+    })
+    assert response.get_json()['formatted_sql'] == 'select A\nfrom T'
+
+
+def test_format_unknown_preset(client):
+    response = client.post('/api/format', json={'sql': 'select 1', 'preset': 'nope'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown preset: nope'
+
+
+def test_format_etag_and_not_modified(client):
+    payload = {'sql': 'select etag_col from t'}
+    response = client.post('/api/format', json=payload)
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'private, max-age=0, must-revalidate'
+    
+    # Equivalent options produce the same validator
+    same = client.post('/api/format', json={**payload, 'options': {'keyword_case': 'upper'}})
+    assert same.headers['ETag'] == etag
+    other = client.post('/api/format', json={**payload, 'options': {'keyword_case': 'lower'}})
+    assert other.headers['ETag'] != etag
+    
+    for tag in (etag, etag[:-1] + ':gzip"'):
+        cached = client.post('/api/format', json=payload, headers={'If-None-Match': tag})
+        assert cached.status_code == 304
+        assert cached.data == b''
+        assert cached.headers['ETag'] == etag
+
+
+def test_validation_results_are_isolated_from_the_cache():
+    sql_formatter = app_module.sql_formatter
+    sql_text = "SELECT a FROM t WHERE b = 'isolated"
+    first = sql_formatter.validate_sql(sql_text)
+    expected = {
+        'is_valid': first['is_valid'],
+        'errors': list(first['errors']),
+        'warnings': list(first['warnings']),
+        'error_details': [dict(detail) for detail in first['error_details']]
+    }
+    first['errors'].append('mutated')
+    first['error_details'][0]['position'] = -1
+    first['error_details'].clear()
+    assert sql_formatter.validate_sql(sql_text) == expected
+
+
+def test_minify_endpoint_uses_cache(client):
+    sql_text = 'select   a ,\n  b   from t -- comment\n'
+    before = app_module.sql_formatter.cache_info()['minify']
+    for _ in range(2):
+        response = client.post('/api/minify', json={'sql': sql_text})
+        assert response.status_code == 200
+        assert response.get_json()['minified_sql'] == 'select a, b from t'
+    after = app_module.sql_formatter.cache_info()['minify']
+    assert (after.misses - before.misses, after.hits - before.hits) == (1, 1)
+    
+    stats = client.get('/api/cache/stats').get_json()
+    assert stats['caches']['minify']['hits'] == after.hits
+
+
+def test_sql_length_limit_counts_characters(client):
+    limit = app_module.SQLFormatterConfig.MAX_SQL_LENGTH
+    # Two UTF-8 bytes per character pushes the body past limit bytes
+    sql_text = 'SELECT ' + 'é' * (limit - len('SELECT '))
+    response = client.post('/api/validate', json={'sql': sql_text})
+    assert response.status_code == 200
+    
+    response = client.post('/api/validate', json={'sql': sql_text + 'x'})
+    assert response.status_code == 413
+    assert response.get_json()['error'] == f'SQL exceeds maximum length of {limit} characters'
+    
+    huge = b'x' * (app_module.MAX_REQUEST_BYTES + 1)
+    response = client.post('/api/validate', data=huge, content_type='application/sql')
+    assert response.status_code == 413
+    assert response.data == app_module._ERROR_PAYLOADS[app_module._ERR_TOO_LARGE]
+
+
+def test_static_assets_revalidate(client):
+    response = client.get('/js/api.js')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == f'public, max-age={app_module.STATIC_MAX_AGE}'
+    etag = response.headers['ETag']
+    response.close()
+    
+    cached = client.get('/js/api.js', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+
+
+def test_warm_up_leaves_cache_stats_empty():
+    # A fresh interpreter, since this session's app has served other tests
+    script = (
+        'import app; '
+        'print(all(info.hits == info.misses == info.currsize == 0 '
+        'for info in app.sql_formatter.cache_info().values()))'
+    )
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == 'True'
+
+
+def test_etag_changes_with_formatter_version(client, monkeypatch):
+    payload = {'sql': 'select version_col from t'}
+    etag = client.post('/api/format', json=payload).headers['ETag']
+    
+    monkeypatch.setattr(app_module, '_FORMATTER_VERSION', 'next-deploy')
+    response = client.post('/api/format', json=payload, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_warm_up_compiles_native_scanner():
+    pytest.importorskip('numba')
+    script = 'import app, formatter; print(callable(formatter._scan_balance_native))'
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[-1] == 'True'
@@ -0,0 +1,187 @@
+"""Tests for the SQLFormatter validation rules and balance scanner."""
+
+import importlib.util
+import sys
+
+import pytest
+
+import formatter
+from formatter import SQLFormatter, _scan_balance, _scan_balance_exact
+
+
+@pytest.fixture
+def sql_formatter():
+    return SQLFormatter()
+
+
+# (sql, expected (open_parens, close_parens, unclosed_at))
+SCAN_CASES = [
+    ("SELECT (a) FROM t", (1, 1, -1)),
+    ("SELECT 'a(' FROM t", (0, 0, -1)),
+    ("SELECT 'it''s (' FROM t WHERE (x = 1)", (1, 1, -1)),
+    ("SELECT '''' || ')' FROM t", (0, 0, -1)),
+    ("SELECT a -- note (\nFROM t", (0, 0, -1)),
+    ("SELECT a FROM t -- trailing ( comment", (0, 0, -1)),
+    ("SELECT \"col(\" FROM t", (0, 0, -1)),
+    ("SELECT a /* ( */ FROM t", (0, 0, -1)),
+    ("SELECT (a FROM t WHERE x = 'y", (1, 0, 27)),
+    ("SELECT \"a FROM t WHERE (x = 'y", (0, 0, 7)),
+    ("SELECT (a) FROM t /* oops WHERE (x", (1, 1, 18)),
+    ("SELECT 'it''s", (0, 0, 7)),
+]
+
+
+@pytest.mark.parametrize('sql_text, expected', SCAN_CASES)
+def test_scan_balance(sql_text, expected):
+    assert _scan_balance(sql_text) == expected
+    assert _scan_balance_exact(sql_text) == expected
+
+
+@pytest.mark.parametrize('sql_text, expected', SCAN_CASES)
+def test_scan_balance_bytes_kernel(sql_text, expected):
+    # The numba kernel's Python source, run uncompiled on the same cases
+    np = pytest.importorskip('numpy')
+    buf = np.frombuffer(sql_text.encode('utf-8'), dtype=np.uint8)
+    assert formatter._scan_balance_bytes(buf) == expected
+
+
+def test_scan_balance_long_input_matches_exact_walk():
+    sql_text = "SELECT a, 'x(' AS b, COUNT(c) FROM t WHERE (d > 1) -- (\n" * 200
+    assert _scan_balance(sql_text) == _scan_balance_exact(sql_text) == (400, 400, -1)
+
+
+def test_scan_balance_many_unclosed_comment_openers():
+    sql_text = 'SELECT a /* x ' + '/* ' * 20000
+    assert _scan_balance(sql_text) == (0, 0, 9)
+
+
+@pytest.mark.parametrize('sql_text, detail_type, message, position, token', [
+    ("SELECT a FROM t WHERE b = 'x;", 'unmatched_quote', 'Unmatched single quote', 26, "'"),
+    ("SELECT \"a FROM t WHERE (x = 'y", 'unmatched_quote', 'Unmatched double quote', 7, '"'),
+    ('SELECT a FROM t /* oops WHERE (x', 'unterminated_comment', 'Unterminated block comment', 16, '/*'),
+])
+def test_validate_reports_unterminated_spans(sql_formatter, sql_text, detail_type, message, position, token):
+    result = sql_formatter.validate_sql(sql_text)
+    assert result['is_valid'] is False
+    assert message in result['errors']
+    assert {'type': detail_type, 'message': message, 'position': position, 'token': token} in result['error_details']
+
+
+@pytest.mark.parametrize('sql_text', [
+    "SELECT 'a(' FROM t;",
+    "SELECT 'it''s' FROM t WHERE (x = 1);",
+    'SELECT a FROM t -- note (\n;',
+    'SELECT a FROM t /* ( */;',
+    'SELECT "weird(" FROM t;',
+])
+def test_validate_ignores_literal_and_comment_contents(sql_formatter, sql_text):
+    result = sql_formatter.validate_sql(sql_text)
+    assert result == {'is_valid': True, 'errors': [], 'warnings': [], 'error_details': []}
+
+
+def test_native_scanner_matches_exact_walk():
+    pytest.importorskip('numba')
+    assert formatter._load_native_scanner()
+    sql_text = "SELECT \"ø(\", 'x(' FROM t WHERE (d > 1) -- (\n" * 200 + "/* é ("
+    assert len(sql_text) > formatter._NUMBA_MIN_LENGTH
+    assert _scan_balance(sql_text) == _scan_balance_exact(sql_text)
+
+
+RENDER_CORPUS = [
+    "select a,b from t where x=1 and y='it''s'",
+    "SELECT COUNT(*) AS n, MAX(price) FROM orders o JOIN users u ON o.user_id = u.id GROUP BY u.id HAVING COUNT(*) > 1 ORDER BY n DESC",
+    "with cte as (select id from t where flag = true) select * from cte where id in (select id from other)",
+    "select case when a > 1 then 'x' else 'y' end, b from t -- trailing comment\nwhere c is not null",
+    "insert into t (a, b) values (1, 'two'), (3, 'four'); update t set a = a + 1 where b = 'two';",
+    "/* header */ delete from t where id not in (select id from keep) /* tail */",
+    'select "Mixed Case", sum(x)/2 from "Table" union all select 1, 2',
+    "   SELECT\n\n  a  ,\tb\nFROM   t   ",
+]
+
+RENDER_OPTIONS = [
+    {},
+    {'reindent': True, 'keyword_case': 'upper'},
+    {'reindent': True, 'indent_width': 4, 'keyword_case': 'lower', 'identifier_case': 'lower'},
+    {'reindent': True, 'comma_first': True, 'use_space_around_operators': True},
+    {'reindent_aligned': True, 'keyword_case': 'capitalize'},
+    {'reindent': True, 'wrap_after': 20, 'strip_comments': True},
+    {'strip_comments': True, 'strip_whitespace': True, 'reindent': False},
+]
+
+
+@pytest.mark.parametrize('options', RENDER_OPTIONS)
+def test_render_matches_sqlparse_format(options):
+    sqlparse = pytest.importorskip('sqlparse')
+    for sql_text in RENDER_CORPUS:
+        expected = sqlparse.format(sql_text, **options)
+        # Twice: the second render reuses the cached token stream
+        assert formatter._render(sql_text, **options) == expected
+        assert formatter._render(sql_text, **options) == expected
+
+
+def test_options_key_is_canonical(sql_formatter):
+    default_key = sql_formatter.options_key()
+    assert sql_formatter.options_key({}) == default_key
+    assert sql_formatter.options_key({'keyword_case': 'upper'}) == default_key
+    # Names the formatter doesn't know about don't split the cache
+    assert sql_formatter.options_key({'add_semicolon': True, 'normalize_functions': False}) == default_key
+    assert (sql_formatter.options_key({'reindent': False, 'keyword_case': 'lower'})
+            == sql_formatter.options_key({'keyword_case': 'lower', 'reindent': False}))
+    assert sql_formatter.options_key({'keyword_case': 'lower'}) != default_key
+    assert sql_formatter.options_key({'wrap_after': [80]}) is None
+
+
+def test_equivalent_options_share_a_cache_entry(sql_formatter):
+    sql_formatter.format_sql('select 1', {'keyword_case': 'upper', 'add_semicolon': True})
+    sql_formatter.format_sql('select 1')
+    info = sql_formatter.cache_info()['format']
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_options_key_interns_case_values(sql_formatter):
+    lower = ''.join(['low', 'er'])
+    key = dict(sql_formatter.options_key({'keyword_case': lower}))
+    assert key['keyword_case'] is sys.intern('lower')
+
+
+def _load_formatter_without_re2(monkeypatch):
+    monkeypatch.setitem(sys.modules, 're2', None)  # import re2 raises ImportError
+    spec = importlib.util.spec_from_file_location('formatter_stdlib_re', formatter.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('sql_text', [
+    'SELECT éa',
+    'SELECT a1, ñame',
+    'SELECT ١٢ + 1',
+    'SELECT 12 + 1',
+])
+def test_validator_agrees_across_regex_engines(monkeypatch, sql_text):
+    stdlib_module = _load_formatter_without_re2(monkeypatch)
+    assert stdlib_module.re is stdlib_module.stdlib_re
+    assert (stdlib_module.SQLFormatter().validate_sql(sql_text)
+            == SQLFormatter().validate_sql(sql_text))
+
+
+def test_non_ascii_identifier_without_from(monkeypatch):
+    for module in (formatter, _load_formatter_without_re2(monkeypatch)):
+        result = module.SQLFormatter().validate_sql('SELECT éa')
+        assert result['is_valid'] is False
+        assert any('missing FROM clause' in error for error in result['errors'])
+
+
+def test_token_cache_skips_long_inputs():
+    formatter._lex_cached.cache_clear()
+    short_sql = 'select a from t where b = 1'
+    long_sql = 'select a from t where b = 1 -- ' + 'x' * formatter._LEX_CACHE_MAX_LENGTH
+    assert formatter._render(short_sql) == formatter._render(short_sql)
+    assert formatter._render(long_sql) == formatter._render(long_sql)
+    info = formatter._lex_cached.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_native_scanner_unavailable_without_numba(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'numba', None)
+    assert formatter._compile_native_scanner() is False